@@ -1,11 +1,14 @@
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, Response, abort, jsonify, render_template, request, redirect, url_for
 
 from src.cube import Cube
-from src.cost import Cost
-from src.model import Model, IDAStar
+from src.model import AnytimeIDAStar
+from src.database import load
+from src import replay
 
-import os
 import json
+import math
+import queue
+import threading
 
 app = Flask(__name__)
 
@@ -13,9 +16,35 @@ DEFAULT_SIZE = 3
 DEFAULT_MAX_DEPTH = 5
 DEFAULT_LOWER_STEP_LIMIT = 1
 DEFAULT_UPPER_STEP_LIMIT = 5
+DEFAULT_TIME_LIMIT = 10
+STREAM_GRACE_PERIOD = 5
 
 cube = None
 
+# pattern databases mapped by this process, keyed by cube size
+databases = {}
+
+def database(size):
+    """
+    Returns the pattern database for a cube size, mapping it on first use and hot-swapping newer versions.
+
+    Args:
+        size (int): Cube size.
+
+    Returns:
+        PatternDatabase: The mapped database.
+    """
+
+    if size not in databases:
+        databases[size] = load(f"./database/cube_{size}x{size}x{size}/", n=size, max_depth=DEFAULT_MAX_DEPTH)
+    else:
+        databases[size].refresh()
+
+    return databases[size]
+
+# build (if needed) and map the default database before a pre-fork server forks its workers, so they share its pages
+database(DEFAULT_SIZE)
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     default_size = DEFAULT_SIZE
@@ -55,28 +84,255 @@ def solve():
     
     shuffle_moves = cube.shuffle(steps_low, steps_high)
 
-    db_directory = f"./database/cube_{size}x{size}x{size}/"
-    db_file_path = db_directory + f"heuristic.json"
+    heuristic = database(size).snapshot
+
+    model = AnytimeIDAStar(heuristic=heuristic, time_limit=DEFAULT_TIME_LIMIT)
+    solve_moves, optimal = model.solve(cube.state)
+
+    if solve_moves is None:
+        print("Error: No solution found within the time limit.")
+        return render_template('index.html', error=f"No solution found within {DEFAULT_TIME_LIMIT} seconds. Try fewer shuffle steps.")
+
+    return render_template('solve.html', size=size, cube=cube, shuffle_moves=shuffle_moves, solve_moves=solve_moves, optimal=optimal)
+
+@app.errorhandler(400)
+def bad_request(error):
+    return jsonify(error=error.description), 400
+
+def api_cube(state):
+    """
+    Builds a cube from a state passed to the JSON API, aborting with 400 if it is invalid.
+
+    Args:
+        state (str): The cube state.
+
+    Returns:
+        Cube: The cube in the given state.
+    """
+
+    if not isinstance(state, str) or not state:
+        abort(400, description="Missing cube state.")
+
+    n = int(round((len(state) / 6) ** 0.5))
+    if 6 * n * n != len(state) or n < 1 or n > 6:
+        abort(400, description="Invalid cube state length.")
+
+    try:
+        return Cube(state=state)
+    except ValueError as e:
+        abort(400, description=str(e))
+
+def api_body():
+    """
+    Reads the JSON body of an API request, aborting with 400 if it is not an object.
+
+    Returns:
+        dict: The request body, empty if none was sent.
+    """
+
+    data = request.get_json(silent=True)
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        abort(400, description="Request body must be a JSON object.")
+
+    return data
+
+def api_moves(codes, n):
+    """
+    Decodes a comma-separated list of moves passed to the JSON API, aborting with 400 if one is invalid.
+
+    Args:
+        codes (str): Encoded moves, e.g. 'h0l,v2u'.
+        n (int): Cube size.
+
+    Returns:
+        list: The moves, each as (twist, index, direction).
+    """
+
+    try:
+        moves = [replay.decode(code) for code in codes.split(',') if code]
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    if any(i >= n for _, i, _ in moves):
+        abort(400, description="Move index out of bounds.")
+
+    return moves
+
+def api_int(data, key, default, low, high):
+    """
+    Reads an integer field of a JSON API request, aborting with 400 if it is out of bounds.
+
+    Args:
+        data (dict): The request body.
+        key (str): Name of the field.
+        default (int): Value used if the field is missing.
+        low (int): Smallest allowed value.
+        high (int): Largest allowed value.
+
+    Returns:
+        int: The field value.
+    """
+
+    value = data.get(key, default)
+    if not isinstance(value, int) or isinstance(value, bool) or value < low or value > high:
+        abort(400, description=f"'{key}' must be an integer between {low} and {high}.")
+
+    return value
+
+def api_state(cube):
+    """
+    Serializes a cube for the JSON API.
+
+    Args:
+        cube (Cube): The cube to serialize.
+
+    Returns:
+        dict: The cube size, state, state hash and whether it is solved.
+    """
+
+    return {"n": cube.n, "state": cube.state, "hash": replay.digest(cube.state), "solved": cube.complete()}
+
+def api_time_limit(value):
+    """
+    Reads the solver time limit of a JSON API request, capped at the default time limit.
+
+    Args:
+        value (float): The requested time limit in seconds, or None for the default.
+
+    Returns:
+        float: The time limit in seconds.
+    """
+
+    try:
+        time_limit = float(value if value is not None else DEFAULT_TIME_LIMIT)
+    except (TypeError, ValueError):
+        abort(400, description="'time_limit' must be a number.")
+    if isinstance(value, bool) or not math.isfinite(time_limit):
+        abort(400, description="'time_limit' must be a finite number.")
+    if time_limit <= 0:
+        abort(400, description="'time_limit' must be positive.")
+
+    return min(time_limit, DEFAULT_TIME_LIMIT)
+
+def sse(event, data):
+    """
+    Formats a server-sent event.
+
+    Args:
+        event (str): Name of the event.
+        data (dict): Payload, sent as compact JSON.
+
+    Returns:
+        str: The event in text/event-stream format.
+    """
+
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+@app.route('/api/cubes', methods=['POST'])
+def api_create():
+    data = api_body()
+    size = api_int(data, 'size', DEFAULT_SIZE, 1, 6)
+
+    return jsonify(api_state(Cube(n=size))), 201
+
+@app.route('/api/shuffle', methods=['POST'])
+def api_shuffle():
+    data = api_body()
+    cube = api_cube(data.get('state'))
+    steps_low = api_int(data, 'lower_limit', DEFAULT_LOWER_STEP_LIMIT, 1, 10)
+    steps_high = api_int(data, 'upper_limit', DEFAULT_UPPER_STEP_LIMIT, steps_low, 10)
+
+    shuffle_moves = cube.shuffle(steps_low, steps_high)
+
+    return jsonify({**api_state(cube), "moves": [replay.encode(move[0]) for move in shuffle_moves]})
+
+@app.route('/api/solve', methods=['POST'])
+def api_solve():
+    data = api_body()
+    cube = api_cube(data.get('state'))
+    time_limit = api_time_limit(data.get('time_limit'))
+
+    model = AnytimeIDAStar(heuristic=database(cube.n).snapshot, time_limit=time_limit)
+    solve_moves, optimal = model.solve(cube.state)
+
+    moves = [replay.encode(move[0]) for move in solve_moves] if solve_moves is not None else None
+    return jsonify({**api_state(cube), "moves": moves, "optimal": optimal})
+
+@app.route('/api/frames', methods=['GET'])
+def api_frame():
+    cube = api_cube(request.args.get('state'))
+    moves = api_moves(request.args.get('moves', ''), cube.n)
+    k = request.args.get('k', str(len(moves)))
+    if not (k.isascii() and k.isdigit()):
+        abort(400, description="'k' must be a non-negative integer.")
+    k = int(k)
+
+    try:
+        state = replay.state_after(cube.state, moves, k)
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    # the response is fully determined by the URL, so it can be cached for good and revalidated by state hash
+    response = jsonify({**api_state(Cube(state=state)), "k": k})
+    response.set_etag(replay.digest(state))
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+
+    return response.make_conditional(request)
+
+@app.route('/api/solve/stream', methods=['GET'])
+def api_solve_stream():
+    cube = api_cube(request.args.get('state'))
+    time_limit = api_time_limit(request.args.get('time_limit'))
+    heuristic = database(cube.n).snapshot
+
+    events = queue.Queue()
+
+    def run():
+        # always end the stream with a terminal event, even if the solver fails
+        try:
+            model = AnytimeIDAStar(heuristic=heuristic, time_limit=time_limit, callback=lambda moves: events.put(('progress', moves)))
+            events.put(('solution', model.solve(cube.state)))
+        except Exception as e:
+            events.put(('error', str(e)))
+
+    threading.Thread(target=run, daemon=True).start()
+
+    def stream():
+        while True:
+            try:
+                event, data = events.get(timeout=time_limit + STREAM_GRACE_PERIOD)
+            except queue.Empty:
+                yield sse('error', {"error": "Solver did not respond within the time limit."})
+                return
+
+            if event == 'error':
+                yield sse('error', {"error": data})
+                return
+
+            if event == 'progress':
+                yield sse('progress', {"length": len(data)})
+                continue
 
-    if not os.path.exists(db_directory):
-        os.makedirs(db_directory)
+            solve_moves, optimal = data
+            moves = [move[0] for move in solve_moves] if solve_moves is not None else []
+            yield sse('solution', {"moves": [replay.encode(move) for move in moves] if solve_moves is not None else None, "optimal": optimal})
 
-    heuristic = None
-    if os.path.exists(db_file_path):
-        with open(db_file_path, "r") as f:
-            heuristic = json.load(f)
+            # replay frames as deltas against the previous frame
+            for k, state, changes in replay.frames(cube.state, moves):
+                yield sse('frame', {"k": k, "move": replay.encode(moves[k-1]), "hash": replay.digest(state), "changes": changes})
 
-    if heuristic is None:
-        print("Heuristic not found, building database...")
-        cost = Cost(n=size, max_depth=DEFAULT_MAX_DEPTH)
-        heuristic = cost.heuristic
-        with open(db_file_path, "w") as f:
-            json.dump(heuristic, f, ensure_ascii=False, indent=4)
+            yield sse('done', {})
+            return
 
-    model = IDAStar(heuristic=heuristic)
-    solve_moves = model.solve(cube.state)
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
 
-    return render_template('solve.html', size=size, cube=cube, shuffle_moves=shuffle_moves, solve_moves=solve_moves)
+    return response
 
 if __name__ == '__main__':
     app.run(debug=True)
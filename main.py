@@ -1,6 +1,7 @@
 from src.cube import Cube
 from src.cost import Cost
-from src.model import IDAStar
+from src.model import IDAStar, AnytimeIDAStar, MeetInTheMiddle
+from src.database import save
 
 import os
 import json
@@ -12,11 +13,14 @@ parser.add_argument("--size", type=int, default=3, help="Size of the Rubik's Cub
 parser.add_argument("--threshold", type=int, default=5, help="Threshold for heuristic database (default: 5).")
 parser.add_argument("--shuffle-lower-bound", type=int, default=1, help="Lower bound for shuffle moves (default: 1).")
 parser.add_argument("--shuffle-upper-bound", type=int, default=5, help="Upper bound for shuffle moves (default: 5).")
+parser.add_argument("--time-limit", type=float, default=None, help="Time budget in seconds for the anytime solver (default: unbounded IDA*).")
+parser.add_argument("--meet-depth", type=int, default=None, help="Forward depth for the meet-in-the-middle solver (default: IDA*).")
 
 args = parser.parse_args()
 
 db_directory = f"./database/cube_{args.size}x{args.size}x{args.size}/"
 db_file_path = db_directory + f"heuristic.json"
+parents_file_path = db_directory + f"parents.json"
 
 if not os.path.exists(db_directory):
     os.makedirs(db_directory)
@@ -26,14 +30,23 @@ if os.path.exists(db_file_path):
     with open(db_file_path, "r") as f:
         heuristic = json.load(f)
 
-if heuristic is None:
+parents = None
+if os.path.exists(parents_file_path):
+    with open(parents_file_path, "r") as f:
+        parents = json.load(f)
+
+if heuristic is None or (args.meet_depth is not None and parents is None):
     print("Heuristic not found, building database...")
     cost = Cost(n=args.size, max_depth=args.threshold)
-    heuristic = cost.heuristic
-    with open(db_file_path, "w") as f:
-        json.dump(heuristic, f, ensure_ascii=False, indent=4)
+    heuristic, parents = cost.heuristic, cost.parents
+    save(db_directory, heuristic, parents)
 
-model = IDAStar(heuristic=heuristic)
+if args.meet_depth is not None:
+    model = MeetInTheMiddle(depth=args.meet_depth, heuristic=heuristic, parents=parents)
+elif args.time_limit is None:
+    model = IDAStar(heuristic=heuristic)
+else:
+    model = AnytimeIDAStar(heuristic=heuristic, time_limit=args.time_limit)
 
 cube = Cube(n=args.size)
 
@@ -44,9 +57,21 @@ moves = "\n" + "\n".join([f"{move[0]}" for move in moves])
 print(f"Shuffled in {n} moves. \nMoves:{moves}")
 
 s = time.perf_counter_ns()
-moves = model.solve(cube.state)
+if isinstance(model, AnytimeIDAStar):
+    moves, optimal = model.solve(cube.state)
+elif isinstance(model, MeetInTheMiddle):
+    moves, optimal = model.solve(cube.state), True
+else:
+    moves, optimal = model.solve(cube.state), None
 e = time.perf_counter_ns()
 
+if moves is None:
+    if args.meet_depth is not None:
+        print(f"\nNo solution found within {args.meet_depth} forward moves of the database.")
+    else:
+        print(f"\nNo solution found within {args.time_limit} s.")
+    raise SystemExit(1)
+
 n = len(moves)
 if moves:
     final_state = moves[-1][1]
@@ -56,4 +81,10 @@ else:
 print()
 
 moves = "\n" + "\n".join([f"{move[0]}" for move in moves])
-print(f"Solved in {n} moves in {(e-s)/1e6:.3f} ms.\nMoves:{moves}")
+if optimal is None:
+    note = ""
+elif optimal:
+    note = " (proven shortest by the heuristic database)"
+else:
+    note = " (not proven to be the shortest)"
+print(f"Solved in {n} moves in {(e-s)/1e6:.3f} ms{note}.\nMoves:{moves}")
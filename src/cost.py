@@ -10,6 +10,8 @@ class Cost:
         n (int): Dimension of the cube (default: 3).
         max_depth (int): Maximum search depth for heuristic generation.
         heuristic (dict): Mapping from cube state to minimal number of moves from solved state.
+        parents (dict): Mapping from cube state to the move that takes it one step closer to the solved state
+                        (None for solved states).
     """
 
     def __init__(self, n=3, max_depth=20):
@@ -24,20 +26,23 @@ class Cost:
         self.n = n
         self.max_depth = max_depth
 
-        self.heuristic = self.heuristic_()
+        self.heuristic, self.parents = self.heuristic_()
 
     def heuristic_(self):
         """
         Generates a heuristic lookup table using BFS from the solved cube state.
         
         Returns:
-            dict: A dictionary mapping cube states to minimal depth (number of moves).
+            tuple: A dictionary mapping cube states to minimal depth (number of moves), and a dictionary
+                   mapping cube states to the move that leads back along a minimal path.
         """
         
         cube = Cube(self.n)
 
         queue = [(cube.state, 0)]
         heuristic = {cube.state: 0}
+        parents = {cube.state: None}
+        inverse = {'left': 'right', 'right': 'left', 'up': 'down', 'down': 'up', 'positive': 'negative', 'negative': 'positive'}
         max_node_count = sum([(len(cube.actions) * cube.n) ** (i) for i in range(self.max_depth+1)])
 
         with tqdm.tqdm(total=max_node_count, desc="Heuristic Database") as progress_bar:
@@ -59,12 +64,12 @@ class Cost:
                         if twist == "side":
                             new_cube.side_rotate(i, move)
 
-                        if new_cube.state not in heuristic:
-                            heuristic[new_cube.state] = depth + 1 if not new_cube.complete() else 0
-                        
-                        heuristic[new_cube.state] = min(heuristic[new_cube.state], depth + 1)
+                        new_depth = depth + 1 if not new_cube.complete() else 0
+                        if new_cube.state not in heuristic or new_depth < heuristic[new_cube.state]:
+                            heuristic[new_cube.state] = new_depth
+                            parents[new_cube.state] = (twist, i, inverse[move]) if new_depth else None
 
                         queue.append((new_cube.state, depth + 1))
                         progress_bar.update(1)
 
-        return heuristic
+        return heuristic, parents
@@ -21,6 +21,16 @@ class Cube:
         side_rotate(dpt, direction): Performs a side rotation of a specified depth across the lateral faces.
     """
 
+    faces = ['Up', 'Left', 'Front', 'Right', 'Back', 'Down']
+    actions = [
+        ('horizontal', 'left'),
+        ('horizontal', 'right'),
+        ('vertical', 'up'),
+        ('vertical', 'down'),
+        ('side', 'positive'),
+        ('side', 'negative')
+    ]
+
     def __init__(self, n=3, colors=['W', 'G', 'O', 'B', 'R', 'Y'], state=None):
         """
     Initializes the Rubik's Cube with a given size, color scheme, and an optional initial state.
@@ -34,7 +44,7 @@ class Cube:
         colors (list): A list of 6 color initials representing the colors for each face of the cube.
                        Default is ['W', 'G', 'O', 'B', 'R', 'Y'], corresponding to white, green, red,
                        blue, orange, and yellow.
-        state (list or str, optional): A list or str containing 6 * n * n elements representing the initial configuration
+        state (list, str or bytes, optional): A list, str or bytes containing 6 * n * n elements representing the initial configuration
                                     of the cube. If None, the cube is initialized to a solved state with uniform
                                     color on each face. If provided, the state must be a valid configuration.
 
@@ -43,46 +53,58 @@ class Cube:
         ValueError: If `state` contains invalid color values (colors not in the provided `colors` list).
     """
         
-        self.state = state
-        self.config = [[[]]]
-        self.faces = ['Up', 'Left', 'Front', 'Right', 'Back', 'Down']
-        self.actions = [
-                ('horizontal', 'left'), 
-                ('horizontal', 'right'), 
-                ('vertical', 'up'), 
-                ('vertical', 'down'), 
-                ('side', 'positive'), 
-                ('side', 'negative')
-            ]
-
         if state is None:
             self.n = n
             self.colors = colors
             self.reset()
         else:
+            if isinstance(state, (bytes, bytearray)):
+                state = state.decode('ascii')
+            elif not isinstance(state, str):
+                state = ''.join(state)
+            state = state.upper()
+
             assert len(state) % 6 == 0, "State must be a multiple of 6."
             self.n = int(math.sqrt(len(state)/6))
 
-            self.colors = []
-            if isinstance(colors, list):
-                state = ''.join(state)
-            if isinstance(colors, str):
-                state = state.upper()
-            
-            for i, s in enumerate(state):
-                s = s.upper()
-                if s not in self.colors:
-                    self.colors.append(s)
-                self.config[-1][-1].append(s)
-                if len(self.config[-1][-1]) == self.n and len(self.config[-1]) < self.n:
-                    self.config[-1].append([])
-                elif len(self.config[-1][-1]) == self.n and len(self.config[-1]) == self.n and i < len(state) - 1:
-                    self.config.append([[]])
+            # the nested configuration is only built when a rotation or template needs it
+            self._state = state
+            self._config = None
+            self.colors = list(dict.fromkeys(state))
 
             if colors is not None:
                 if set(colors) != set(self.colors):
                     raise ValueError("State colors do not match provided colors.")
 
+    @property
+    def state(self):
+        """
+        str: The cube's configuration as a string of 6 * n * n color initials, face by face.
+        """
+
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        self._state = state
+        self._config = None
+
+    @property
+    def config(self):
+        """
+        list: A 3D list of the color configuration for each face, built from the state on first access.
+        """
+
+        if self._config is None:
+            n, state = self.n, self._state
+            self._config = [[list(state[i:i+n]) for i in range(k, k + n * n, n)] for k in range(0, 6 * n * n, n * n)]
+
+        return self._config
+
+    @config.setter
+    def config(self, config):
+        self._config = config
+
     def __str__(self):
         """
         Returns a formatted string representation of the cube's face configurations.
@@ -104,7 +126,7 @@ class Cube:
         """
 
         self.config = [[[color for _ in range(self.n)] for _ in range(self.n)] for color in self.colors]
-        self.state = self.stringify()
+        self._state = self.stringify()
 
         # horizontal rotate testing
         # self.config[0] = [['1', '2', '3'], ['4', '5', '6'], ['7', '8', '9']]  # Up
@@ -126,79 +148,52 @@ class Cube:
             str: A string representation of the cube's configuration.
         """
 
-        def flatten(lst):
-            """
-            Flattens a nested list structure into a list of elements.
-            
-            This helper function takes a list (which may contain nested lists) and flattens it
-            into a list of elements. It is used to convert the cube's configuration into a string 
-            format.
-            
-            Args:
-                lst (list): A list which may contain nested lists.
-                
-            Returns:
-                list: A list containing the state found in the list.
-            """
-
-            result = []
-
-            for ls in lst:
-                if isinstance(ls, list):
-                    result.extend(flatten(ls))
-                else:
-                    result.append(ls)
-            
-            return result
-        
-        result = flatten(self.config)
-        result = ''.join(result)
-        
-        return result
+        return ''.join([''.join(row) for face in self.config for row in face])
 
     def complete(self):
         """
         Determines if the Rubik's Cube is solved by checking if each face consists of a single color.
-        
+
+        The state is compared against the goal state with the same face colors, which is built with one
+        string repetition per face instead of inspecting the nested configuration.
+
         Returns:
             bool: True if the Rubik's Cube is solved (all faces have a single color), 
                   False otherwise.
         """
 
-        def flatten(lst):
-            """
-            Flattens a nested list structure into a set of unique elements.
-            
-            This helper function takes a list (which may contain nested lists) and flattens it
-            into a set of unique elements. It is used to check if all elements on a face are the
-            same color.
-            
-            Args:
-                lst (list): A list which may contain nested lists.
-                
-            Returns:
-                set: A set containing the unique elements found in the list.
-            """
-
-            result = set()
-
-            for ls in lst:
-                if isinstance(ls, list):
-                    result.update(flatten(ls))
-                else:
-                    result.add(ls)
-
-            return result
-        
-        isSolved = True
+        state, nn = self._state, self.n * self.n
+        return state == ''.join([state[k] * nn for k in range(0, 6 * nn, nn)])
 
-        for face in self.config:
-            if len(flatten(face)) != 1:
-                isSolved = False
-                break
+    def orientations(self):
+        """
+        Lists the states of the cube in each of its 24 orientations.
+
+        Turning every slice of a twist in the same direction rotates the whole cube, so the orientations are
+        found by a breadth-first search over the three whole-cube turns. Since slice moves can turn the whole
+        cube, every orientation of a solved cube is solved as well.
+
+        Returns:
+            list: The states of the cube in every orientation, starting with the current one.
+        """
+
+        states = [self.state]
+        for state in states:
+            for twist, direction in [('horizontal', 'left'), ('vertical', 'up'), ('side', 'positive')]:
+                cube = Cube(state=state, colors=None)
+                for i in range(self.n):
+                    if twist == 'horizontal':
+                        cube.horizontal_rotate(i, direction)
+                    elif twist == 'vertical':
+                        cube.vertical_rotate(i, direction)
+                    elif twist == 'side':
+                        cube.side_rotate(i, direction)
+
+                if cube.state not in states:
+                    states.append(cube.state)
+
+        return states
 
-        return isSolved
-    
     def shuffle(self, lower_limit, upper_limit):
         """
         Shuffles the Rubik's Cube by performing a random series of rotations.
@@ -252,7 +247,7 @@ class Cube:
 
             moves.append(((twist, i, move), self.state))
 
-        self.state = self.stringify()
+        self._state = self.stringify()
 
         return moves
 
@@ -299,7 +294,7 @@ class Cube:
                 # clockwise rotation for the bottom row
                 self.config[5] = ([list(row) for row in zip(*reversed(self.config[5]))])
 
-        self.state = self.stringify()
+        self._state = self.stringify()
 
     def vertical_rotate(self, col, direction):
         """
@@ -346,7 +341,7 @@ class Cube:
                 # counter-clockwise rotation for the right column
                 self.config[3] = [list(row) for row in zip(*self.config[3])][::-1]
 
-        self.state = self.stringify()
+        self._state = self.stringify()
 
     def side_rotate(self, dpt, direction):
         """
@@ -393,4 +388,4 @@ class Cube:
                 # clockwise rotation for the back face
                 self.config[4] = [list(row) for row in zip(*reversed(self.config[4]))]
         
-        self.state = self.stringify()
+        self._state = self.stringify()
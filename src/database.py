@@ -0,0 +1,469 @@
+from src.cube import Cube
+from src.cost import Cost
+
+import os
+import json
+import mmap
+import fcntl
+import bisect
+import struct
+import argparse
+import tempfile
+import contextlib
+
+class PatternDatabase:
+    """
+    A read-only heuristic database that is published once to disk and memory-mapped by every process using it.
+
+    The heuristic is stored as a sorted block of fixed-width states followed by a block of one-byte depths and,
+    optionally, a block of one-byte parent moves, so lookups are a binary search over the mapping. Processes
+    that map the same file (including forked workers) share its pages through the page cache instead of each
+    holding a copy of the dict. Every publish writes a new versioned file and atomically updates a version
+    pointer, which `refresh` uses to hot-swap the mapping.
+
+    Attributes:
+        directory (str): Directory holding the versioned database files.
+        snapshot (Snapshot): The currently mapped version, which lookups are delegated to.
+    """
+
+    MAGIC = b'CCPD'
+    HEADER = struct.Struct('<4sIII')
+
+    def __init__(self, directory):
+        """
+        Maps the latest published version of the database in the given directory.
+
+        Args:
+            directory (str): Directory the database was published to.
+
+        Raises:
+            FileNotFoundError: If no database has been published to the directory.
+            ValueError: If the database file is corrupt.
+        """
+
+        self.directory = directory
+        self.snapshot = self.attach_(self.current_version(directory))
+
+    @staticmethod
+    def current_version(directory):
+        """
+        Reads the version pointer of a database directory.
+
+        Args:
+            directory (str): Directory the database was published to.
+
+        Returns:
+            int: The latest published version, or None if nothing has been published.
+        """
+
+        try:
+            with open(os.path.join(directory, "heuristic.version"), "r") as f:
+                return int(f.read())
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def path(directory, version):
+        """
+        Returns the path of a versioned database file.
+
+        Args:
+            directory (str): Directory the database was published to.
+            version (int): Version of the database.
+
+        Returns:
+            str: Path to the database file.
+        """
+
+        return os.path.join(directory, f"heuristic.v{version}.db")
+
+    @staticmethod
+    @contextlib.contextmanager
+    def lock(directory):
+        """
+        Holds an exclusive lock on a database directory, shared by every process publishing to it.
+
+        Args:
+            directory (str): Directory the database is published to.
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "heuristic.lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @classmethod
+    def publish(cls, heuristic, directory, parents=None):
+        """
+        Writes a heuristic dict as a new database version and points readers to it.
+
+        Files are written under a unique temporary name and moved into place, so readers never see a partial
+        file, and versions are allocated under the directory lock, so concurrent publishers never share one.
+        Versions older than the previous one are removed; processes still mapping them keep their pages.
+
+        Args:
+            heuristic (dict): Mapping from cube state to minimal number of moves from solved state.
+            directory (str): Directory to publish the database to.
+            parents (dict, optional): Mapping from cube state to the move that takes it one step closer to the
+                                      solved state, as built by `Cost`. Default is None.
+
+        Returns:
+            int: The published version.
+
+        Raises:
+            ValueError: If the states differ in length, a depth does not fit in a byte or `parents` misses the
+                        move of a state that is not solved.
+        """
+
+        with cls.lock(directory):
+            return cls.publish_(heuristic, directory, parents)
+
+    @classmethod
+    def publish_(cls, heuristic, directory, parents=None):
+        """
+        Publishes a heuristic like `publish`, for callers that already hold the directory lock.
+        """
+
+        keys = sorted(state.encode('ascii') for state in heuristic)
+        width = len(keys[0]) if keys else 0
+        if any(len(key) != width for key in keys):
+            raise ValueError("All states must have the same length.")
+        if any(depth > 255 for depth in heuristic.values()):
+            raise ValueError("Depths must fit in a single byte.")
+        if parents is not None and any(depth and parents.get(state) is None for state, depth in heuristic.items()):
+            raise ValueError("Parents must hold a move for every state that is not solved.")
+
+        n = int((width / 6) ** 0.5)
+        values = bytes(heuristic[key.decode('ascii')] for key in keys)
+        if parents is not None:
+            values += bytes(_Parents.encode(parents.get(key.decode('ascii')), n) for key in keys)
+
+        version = (cls.current_version(directory) or 0) + 1
+
+        cls.write_(cls.path(directory, version), cls.HEADER.pack(cls.MAGIC, n, width, len(keys)) + b''.join(keys) + values)
+        cls.write_(os.path.join(directory, "heuristic.version"), str(version).encode('ascii'))
+
+        for old in range(1, version - 1):
+            if os.path.exists(cls.path(directory, old)):
+                os.remove(cls.path(directory, old))
+
+        return version
+
+    @staticmethod
+    def write_(path, data):
+        """
+        Writes a file atomically through a unique temporary file in the same directory.
+
+        Args:
+            path (str): Path of the file.
+            data (bytes): Contents of the file.
+        """
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def attach_(self, version):
+        """
+        Maps the given version of the database.
+
+        Args:
+            version (int): Version of the database to map.
+
+        Returns:
+            Snapshot: The mapped version.
+
+        Raises:
+            FileNotFoundError: If the version does not exist.
+            ValueError: If the database file is corrupt.
+        """
+
+        if version is None:
+            raise FileNotFoundError(f"No pattern database published in {self.directory}.")
+
+        return Snapshot(self.path(self.directory, version), version)
+
+    def refresh(self):
+        """
+        Switches to the latest published version if it differs from the mapped one.
+
+        The new version is mapped in full before it replaces the current snapshot in a single assignment, so
+        concurrent lookups see either the old or the new version, never a mix of both.
+
+        Returns:
+            bool: True if a new version was mapped, False otherwise.
+        """
+
+        version = self.current_version(self.directory)
+        if version is None or version == self.snapshot.version:
+            return False
+
+        self.snapshot = self.attach_(version)
+        return True
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    @property
+    def n(self):
+        return self.snapshot.n
+
+    @property
+    def parents(self):
+        return self.snapshot.parents
+
+    def get(self, state, default=None):
+        return self.snapshot.get(state, default)
+
+    def values(self):
+        return self.snapshot.values()
+
+    def __getitem__(self, state):
+        return self.snapshot[state]
+
+    def __contains__(self, state):
+        return state in self.snapshot
+
+    def __len__(self):
+        return len(self.snapshot)
+
+class Snapshot:
+    """
+    An immutable, dict-like view of one mapped version of a pattern database.
+
+    Solvers should hold a snapshot rather than the `PatternDatabase`, so a refresh during a solve does not
+    change the distances it sees.
+
+    Attributes:
+        version (int): Version of the mapped database.
+        n (int): Dimension of the cube the database was built for.
+        parents (_Parents): View of the parent moves, or None if they were not published.
+    """
+
+    def __init__(self, path, version):
+        """
+        Maps a database file and parses its header.
+
+        Args:
+            path (str): Path to the database file.
+            version (int): Version of the database.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the database file is corrupt.
+        """
+
+        header = PatternDatabase.HEADER
+
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, n, width, count = header.unpack_from(buffer, 0)
+        if magic != PatternDatabase.MAGIC or len(buffer) not in (header.size + count * (width + 1), header.size + count * (width + 2)):
+            raise ValueError(f"Corrupt pattern database: {path}.")
+
+        self.buffer = buffer
+        self.version = version
+        self.n = n
+        self.count = count
+        self.keys = _Keys(buffer, header.size, width, count)
+        self.values_offset = header.size + count * width
+        self.parents = _Parents(buffer, self.keys, n, self.values_offset + count) if len(buffer) > self.values_offset + count else None
+
+    def get(self, state, default=None):
+        """
+        Looks up the depth of a state.
+
+        Args:
+            state (str): The cube state.
+            default (int, optional): Value returned for states not in the database. Default is None.
+
+        Returns:
+            int: Minimal number of moves from the solved state, or `default`.
+        """
+
+        i = self.keys.index(state)
+        return self.buffer[self.values_offset + i] if i is not None else default
+
+    def values(self):
+        """
+        Returns the depths of all states, in key order.
+
+        Returns:
+            bytes: One depth per state.
+        """
+
+        return self.buffer[self.values_offset:self.values_offset + self.count]
+
+    def __getitem__(self, state):
+        depth = self.get(state)
+        if depth is None:
+            raise KeyError(state)
+        return depth
+
+    def __contains__(self, state):
+        return self.get(state) is not None
+
+    def __len__(self):
+        return self.count
+
+class _Keys:
+    """
+    A sequence view over the sorted state block of a mapped database, used for binary search.
+    """
+
+    def __init__(self, buffer, offset, width, count):
+        self.buffer = buffer
+        self.offset = offset
+        self.width = width
+        self.count = count
+
+    def __getitem__(self, i):
+        start = self.offset + i * self.width
+        return self.buffer[start:start + self.width]
+
+    def __len__(self):
+        return self.count
+
+    def index(self, state):
+        """
+        Finds the record of a state by binary search.
+
+        Args:
+            state (str): The cube state.
+
+        Returns:
+            int: Index of the record, or None if the state is not in the database.
+        """
+
+        try:
+            key = state.encode('ascii')
+        except UnicodeEncodeError:
+            return None
+        if len(key) != self.width:
+            return None
+
+        i = bisect.bisect_left(self, key)
+        if i < self.count and self[i] == key:
+            return i
+        return None
+
+class _Parents:
+    """
+    A read-only view of the parent moves of a mapped database, looked up like a dict.
+
+    The view is bound to the mapping it was created from, so it stays valid after the database is refreshed.
+    Each move is stored as a byte `action * n + index`, with `action` indexing `Cube.actions`; 255 marks
+    solved states, which have no parent.
+    """
+
+    NONE = 255
+
+    def __init__(self, buffer, keys, n, offset):
+        self.buffer = buffer
+        self.keys = keys
+        self.n = n
+        self.offset = offset
+
+    @staticmethod
+    def encode(move, n):
+        if move is None:
+            return _Parents.NONE
+        twist, i, direction = move
+        return Cube.actions.index((twist, direction)) * n + i
+
+    def get(self, state, default=None):
+        i = self.keys.index(state)
+        if i is None:
+            return default
+
+        code = self.buffer[self.offset + i]
+        if code == self.NONE:
+            return None
+
+        twist, direction = Cube.actions[code // self.n]
+        return twist, code % self.n, direction
+
+def save(directory, heuristic, parents):
+    """
+    Writes a heuristic and its parent moves as JSON, the source a database is published from.
+
+    Args:
+        directory (str): Directory holding the database files.
+        heuristic (dict): Mapping from cube state to minimal number of moves from solved state.
+        parents (dict): Mapping from cube state to the move that takes it one step closer to the solved state.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "heuristic.json"), "w") as f:
+        json.dump(heuristic, f, ensure_ascii=False, indent=4)
+    with open(os.path.join(directory, "parents.json"), "w") as f:
+        json.dump(parents, f, ensure_ascii=False)
+
+def load(directory, n=3, max_depth=5):
+    """
+    Maps the database in a directory, publishing it from `heuristic.json` or building it first if needed.
+
+    Publishing happens under the directory lock, so when several processes load the same directory only the
+    first builds and publishes it, and the others map that version.
+
+    Args:
+        directory (str): Directory holding the database files.
+        n (int, optional): Cube size, used if the database has to be built. Defaults to 3.
+        max_depth (int, optional): Depth limit, used if the database has to be built. Defaults to 5.
+
+    Returns:
+        PatternDatabase: The mapped database.
+    """
+
+    if PatternDatabase.current_version(directory) is None:
+        with PatternDatabase.lock(directory):
+            # another process may have published the database while this one waited for the lock
+            if PatternDatabase.current_version(directory) is None:
+                db_file_path = os.path.join(directory, "heuristic.json")
+                parents_file_path = os.path.join(directory, "parents.json")
+
+                heuristic = None
+                if os.path.exists(db_file_path):
+                    with open(db_file_path, "r") as f:
+                        heuristic = json.load(f)
+
+                parents = None
+                if os.path.exists(parents_file_path):
+                    with open(parents_file_path, "r") as f:
+                        parents = json.load(f)
+
+                if heuristic is None:
+                    print("Heuristic not found, building database...")
+                    cost = Cost(n=n, max_depth=max_depth)
+                    heuristic, parents = cost.heuristic, cost.parents
+                    save(directory, heuristic, parents)
+
+                PatternDatabase.publish_(heuristic, directory, parents)
+
+    return PatternDatabase(directory)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild and publish a pattern database; running servers pick it up on their next solve.")
+    parser.add_argument("--size", type=int, default=3, help="Size of the Rubik's Cube (default: 3).")
+    parser.add_argument("--threshold", type=int, default=5, help="Threshold for heuristic database (default: 5).")
+
+    args = parser.parse_args()
+
+    db_directory = f"./database/cube_{args.size}x{args.size}x{args.size}/"
+
+    cost = Cost(n=args.size, max_depth=args.threshold)
+    save(db_directory, cost.heuristic, cost.parents)
+
+    version = PatternDatabase.publish(cost.heuristic, db_directory, cost.parents)
+    print(f"Published version {version} of {db_directory}.")
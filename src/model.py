@@ -1,6 +1,10 @@
 from src.cube import Cube
 
 import random
+import time
+
+# colour relabelings that map each solved orientation onto the solved state the database is built from, keyed by n
+relabelings = {}
 
 class Model:
 
@@ -50,14 +54,76 @@ class IDAStar(Model):
         if self.max_threshold < len(self.moves):
             return False
 
+        if self.prune_(cube, g_score, h_score):
+            return False
+
         if f_score > self.curr_threshold:
             self.next_threshold = min(self.next_threshold, f_score)
             return False
         
         if cube.complete():
-            return True
+            return self.found_()
         
         next_moves = []
+        last_move = self.moves[-1][0] if self.moves else None
+        for (twist, i, move), new_cube in self.successors_(cube, last_move):
+            # calculate the heuristic cost
+            h_score = self.heuristic_(new_cube)
+            f_score = (g_score + 1) + h_score
+            next_moves.append((f_score, (twist, i, move), new_cube.state))
+
+        sorted_moves = sorted(next_moves, key=lambda x: x[0], reverse=False)
+        
+        for f_score_, (twist, i, move), new_state in sorted_moves:
+            self.moves.append(((twist, i, move), new_state))
+
+            isSolved = self.search(new_state, g_score+1)
+            if isSolved:
+                return True
+            
+            self.moves.pop()
+                
+        return False
+
+    def prune_(self, cube, g_score, h_score):
+        """
+        Decides whether to cut off the current path before the threshold test. Subclasses override this.
+
+        Args:
+            cube (Cube): A Cube object representing the current configuration.
+            g_score (int): The cost to reach the current state.
+            h_score (int): The heuristic estimate for the current state.
+
+        Returns:
+            bool: True if the path must not be explored further, False otherwise.
+        """
+
+        return False
+
+    def found_(self):
+        """
+        Handles a solved state reached by the search. Subclasses override this.
+
+        Returns:
+            bool: True to stop the search with the current path as the solution, False to keep searching.
+        """
+
+        return True
+
+    def successors_(self, cube, last_move=None):
+        """
+        Generates the cubes reachable from the given cube in a single move.
+        The move that would undo the last move on the path is skipped.
+
+        Args:
+            cube (Cube): A Cube object representing the current configuration.
+            last_move (tuple, optional): The last move on the path as (twist, index, direction). Default is None.
+
+        Returns:
+            list: A list of tuples containing the move and the resulting Cube object.
+        """
+
+        successors = []
         for action in cube.actions:
             for i in range(cube.n):
                 new_cube = Cube(state=cube.state)
@@ -68,37 +134,23 @@ class IDAStar(Model):
                 # apply the move
                 if twist == "horizontal":
                     inverse_move = "right" if move == "left" else "left"
-                    if self.moves and self.moves[-1][0] == (twist, i, inverse_move):
+                    if last_move == (twist, i, inverse_move):
                         continue
                     new_cube.horizontal_rotate(i, move)
                 elif twist == "vertical":
                     inverse_move = "down" if move == "up" else "up"
-                    if self.moves and self.moves[-1][0] == (twist, i, inverse_move):
+                    if last_move == (twist, i, inverse_move):
                         continue
                     new_cube.vertical_rotate(i, move)
                 elif twist == "side":
                     inverse_move = "negative" if move == "positive" else "positive"
-                    if self.moves and self.moves[-1][0] == (twist, i, inverse_move):
+                    if last_move == (twist, i, inverse_move):
                         continue
                     new_cube.side_rotate(i, move)
 
-                # calculate the heuristic cost
-                h_score = self.heuristic_(new_cube)
-                f_score = (g_score + 1) + h_score
-                next_moves.append((f_score, (twist, i, move), new_cube.state))
+                successors.append(((twist, i, move), new_cube))
 
-        sorted_moves = sorted(next_moves, key=lambda x: x[0], reverse=False)
-        
-        for f_score_, (twist, i, move), new_state in sorted_moves:
-            self.moves.append(((twist, i, move), new_state))
-
-            isSolved = self.search(new_state, g_score+1)
-            if isSolved:
-                return True
-            
-            self.moves.pop()
-                
-        return False
+        return successors
 
     def heuristic_(self, cube):
         """
@@ -134,6 +186,38 @@ class IDAStar(Model):
             return misplaced_pieces
         
         return self.heuristic.get(cube.state, simpler_heuristic_(cube)) if self.heuristic else simpler_heuristic_(cube)
+
+    def lookup_(self, state):
+        """
+        Looks up the distance from a state to the nearest solved orientation in the heuristic database.
+
+        The database only holds distances to the solved state it was built from. A move sequence that takes a
+        state to another solved orientation takes the state relabeled with that orientation's colours to the
+        database's solved state, so the state is probed once per orientation and the shortest distance is kept.
+
+        Args:
+            state (str): The cube state.
+
+        Returns:
+            tuple: The distance and the `str.translate` table of the relabeling it was found under, or
+                   (None, None) if no relabeling of the state is in the database.
+        """
+
+        if not self.heuristic:
+            return None, None
+
+        n = int(round((len(state) / 6) ** 0.5))
+        if n not in relabelings:
+            solved, nn = Cube(n).state, n * n
+            relabelings[n] = [str.maketrans({s[k]: solved[k] for k in range(0, 6 * nn, nn)}) for s in Cube(n).orientations()]
+
+        depth, table = None, None
+        for relabeling in relabelings[n]:
+            depth_ = self.heuristic.get(state.translate(relabeling))
+            if depth_ is not None and (depth is None or depth_ < depth):
+                depth, table = depth_, relabeling
+
+        return depth, table
     
     def solve(self, state):
         """
@@ -155,3 +239,342 @@ class IDAStar(Model):
                 self.curr_threshold = self.next_threshold
                 self.moves = []
                 self.next_threshold = float('inf')
+
+class AnytimeIDAStar(IDAStar):
+    """
+    Implements an anytime solver that returns the best solution found within a time or node budget.
+
+    Beam searches of increasing width find an initial solution quickly. The remaining budget is spent on an IDA*
+    search that prunes every path which cannot beat the best solution found so far, improving it when possible.
+    That search estimates states missing from the heuristic database as one move beyond its deepest level, which
+    never overestimates, so the best solution is proven optimal once the search completes within the budget.
+    """
+
+    def __init__(self, threshold=20, heuristic=None, time_limit=1.0, node_limit=None, widths=(16, 64, 256), callback=None):
+        """
+        Initializes the anytime solver.
+
+        Args:
+            threshold (int): Maximum solution length explored by the search.
+            heuristic (dict): Heuristic function to estimate the cost to reach the goal. Default is None.
+            time_limit (float, optional): Wall-clock budget in seconds. None for no time limit. Default is 1.0.
+            node_limit (int, optional): Maximum number of expanded nodes. None for no node limit. Default is None.
+            widths (tuple): Beam widths tried, in order, until one finds a solution. Default is (16, 64, 256).
+            callback (callable, optional): Called with the new best list of moves each time the solution improves.
+        """
+
+        super().__init__(threshold=threshold, heuristic=heuristic)
+
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.widths = widths
+        self.callback = callback
+
+        self.deadline = float('inf')
+        self.nodes = 0
+        self.expired = False
+
+        self.best = None
+        self.optimal = False
+
+        # every state within the database's depth is in it, so any other state is at least one move further
+        self.bound = max(heuristic.values(), default=0) + 1 if heuristic else 1
+
+    def exhausted_(self):
+        """
+        Counts an expanded node and checks whether the time or node budget has been used up.
+
+        Returns:
+            bool: True if the search must stop, False otherwise.
+        """
+
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            self.expired = True
+        elif time.perf_counter() >= self.deadline:
+            self.expired = True
+
+        return self.expired
+
+    def improve_(self, moves):
+        """
+        Records a new best solution and reports it to the callback.
+
+        Args:
+            moves (list): A list of moves representing the solution path.
+        """
+
+        self.best = moves
+        if self.callback is not None:
+            self.callback(moves)
+
+    def beam_search(self, state, width):
+        """
+        Searches breadth-first while keeping only the `width` most promising states of each layer.
+
+        Args:
+            state (tuple): The starting state of the cube.
+            width (int): Number of states kept per layer.
+
+        Returns:
+            list: A list of moves representing the solution path, or None if no solution was found.
+        """
+
+        layer = [(super().heuristic_(Cube(state=state)), state, [])]
+        visited = {state}
+
+        while layer:
+            next_layer = []
+            for h_score, state_, path in layer:
+                if self.exhausted_():
+                    return None
+
+                cube = Cube(state=state_)
+                if cube.complete():
+                    return path
+
+                if self.max_threshold <= len(path):
+                    continue
+
+                last_move = path[-1][0] if path else None
+                for move, new_cube in self.successors_(cube, last_move):
+                    if new_cube.state in visited:
+                        continue
+                    visited.add(new_cube.state)
+                    next_layer.append((super().heuristic_(new_cube), new_cube.state, path + [(move, new_cube.state)]))
+
+            layer = sorted(next_layer, key=lambda x: x[0])[:width]
+
+        return None
+
+    def prune_(self, cube, g_score, h_score):
+        """
+        Cuts off every path once the budget is used up, and every path that cannot beat the best solution.
+
+        Args:
+            cube (Cube): A Cube object representing the current configuration.
+            g_score (int): The cost to reach the current state.
+            h_score (int): The heuristic estimate for the current state.
+
+        Returns:
+            bool: True if the path must not be explored further, False otherwise.
+        """
+
+        if self.expired or self.exhausted_():
+            return True
+
+        # no completion of this path can beat the best solution found so far
+        return self.best is not None and g_score + h_score >= len(self.best)
+
+    def heuristic_(self, cube):
+        """
+        Estimates the cost to reach the nearest solved orientation without overestimating it.
+
+        Args:
+            cube (Cube): A Cube object representing the current configuration.
+
+        Returns:
+            int: The database distance, 0 for a solved cube, or `bound` for states missing from the database.
+        """
+
+        depth, _ = self.lookup_(cube.state)
+        if depth is not None:
+            return depth
+
+        return 0 if cube.complete() else self.bound
+
+    def found_(self):
+        """
+        Records the current path as the new best solution.
+
+        Returns:
+            bool: True, since the current path is shorter than the previous best solution.
+        """
+
+        self.improve_(list(self.moves))
+        return True
+
+    def solve(self, state):
+        """
+        Improves on the best solution found until the budget expires or the solution is proven optimal.
+
+        Args:
+            state (tuple): The starting state of the cube.
+
+        Returns:
+            tuple: The best list of moves found (None if no solution was found within the budget)
+                   and a flag that is True if the solution is proven optimal.
+        """
+
+        self.deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else float('inf')
+        self.nodes = 0
+        self.expired = False
+
+        self.best = None
+        self.optimal = False
+
+        for width in self.widths:
+            moves = self.beam_search(state, width)
+            if self.expired:
+                return self.best, self.optimal
+            if moves is not None:
+                self.improve_(moves)
+                break
+
+        self.moves = []
+        self.curr_threshold = self.heuristic_(Cube(state=state))
+        self.next_threshold = float('inf')
+
+        while True:
+            isSolved = self.search(state, 0)
+
+            if self.expired:
+                return self.best, self.optimal
+
+            if isSolved or self.next_threshold == float('inf'):
+                break
+
+            self.curr_threshold = self.next_threshold
+            self.moves = []
+            self.next_threshold = float('inf')
+
+        self.optimal = self.best is not None
+
+        return self.best, self.optimal
+
+class MeetInTheMiddle(IDAStar):
+    """
+    Implements a bidirectional meet-in-the-middle search that uses the heuristic database as the backward frontier.
+
+    The database holds every state within d moves of the solved state together with the move that leads one step
+    back towards it. The forward search enumerates the states up to `depth` moves away from the scramble, layer by
+    layer, and probes each one against the database in every orientation of the solved state. The first hit is
+    joined to the backward path recorded in the database, which solves scrambles of up to depth + d moves with
+    about (6n)^depth probes.
+    """
+
+    def __init__(self, depth=3, heuristic=None, parents=None):
+        """
+        Initializes the meet-in-the-middle solver.
+
+        Args:
+            depth (int): Maximum number of forward moves searched from the scramble.
+            heuristic (dict): Mapping from cube state to minimal number of moves from solved state.
+            parents (dict): Mapping from cube state to the move that takes it one step closer to the solved state.
+        """
+
+        super().__init__(threshold=depth, heuristic=heuristic)
+
+        self.depth = depth
+        self.parents = parents
+        self.probes = 0
+
+        self.meet = None
+
+    def search(self, state, g_score):
+        """
+        Recursively enumerates the states exactly `curr_threshold` moves away and probes them against the database.
+        The distance and relabeling of the first hit are kept as the meeting point.
+
+        Args:
+            state (tuple): The current state of the cube.
+            g_score (int): The cost to reach the current state.
+
+        Returns:
+            bool: True if a state in the database is reached, False otherwise.
+        """
+
+        if g_score == self.curr_threshold:
+            self.probes += 1
+            self.meet = self.lookup_(state)
+            return self.meet[0] is not None
+
+        cube = Cube(state=state)
+
+        last_move = self.moves[-1][0] if self.moves else None
+        for move, new_cube in self.successors_(cube, last_move):
+            self.moves.append((move, new_cube.state))
+
+            isSolved = self.search(new_cube.state, g_score+1)
+            if isSolved:
+                return True
+
+            self.moves.pop()
+
+        return False
+
+    def backward_(self, state, depth, table):
+        """
+        Follows the parent moves recorded in the database from a state back to a solved state.
+
+        The parent moves are looked up under the relabeling the state was found with, and applied to the state
+        itself, which therefore ends in the solved orientation that relabeling maps onto the database's.
+
+        Args:
+            state (tuple): A state whose relabeling is in the database.
+            depth (int): Distance of the relabeled state in the database.
+            table (dict): The `str.translate` table of the relabeling.
+
+        Returns:
+            list: A list of moves from the given state to a solved state.
+
+        Raises:
+            ValueError: If the parent moves do not lead to a solved state in `depth` moves.
+        """
+
+        moves = []
+        for _ in range(depth):
+            parent = self.parents.get(state.translate(table))
+            if parent is None:
+                break
+            twist, i, move = parent
+
+            cube = Cube(state=state, colors=None)
+            if twist == "horizontal":
+                cube.horizontal_rotate(i, move)
+            elif twist == "vertical":
+                cube.vertical_rotate(i, move)
+            elif twist == "side":
+                cube.side_rotate(i, move)
+
+            state = cube.state
+            moves.append(((twist, i, move), state))
+
+        if not Cube(state=state, colors=None).complete():
+            raise ValueError("The parent moves of the database do not lead to a solved state.")
+
+        return moves
+
+    def solve(self, state):
+        """
+        Searches forward with increasing depth until a state in the database is reached.
+
+        Every state within d moves of a solved orientation is found in the database, so the first forward depth
+        k with a hit is the length of the shortest solution minus d (or 0), and every hit at that depth is exactly
+        d moves (or the shortest solution length) from its nearest solved orientation. The solution is therefore
+        a shortest one.
+
+        Args:
+            state (tuple): The starting state of the cube.
+
+        Returns:
+            list: A list of moves representing the solution path, or None if the scramble is more than
+                  depth + d moves from solved.
+
+        Raises:
+            ValueError: If no parent moves were provided, or they do not lead to a solved state.
+        """
+
+        if self.parents is None:
+            raise ValueError("Meet-in-the-middle search requires the parent moves of the database.")
+
+        self.probes = 0
+
+        for depth in range(self.depth + 1):
+            self.moves = []
+            self.curr_threshold = depth
+
+            if self.search(state, 0):
+                return self.moves + self.backward_(self.moves[-1][1] if self.moves else state, *self.meet)
+
+        return None
@@ -0,0 +1,140 @@
+from src.cube import Cube
+
+import hashlib
+
+TWISTS = {'h': 'horizontal', 'v': 'vertical', 's': 'side'}
+DIRECTIONS = {'l': 'left', 'r': 'right', 'u': 'up', 'd': 'down', 'p': 'positive', 'n': 'negative'}
+
+# sticker permutations keyed by (n, move)
+permutations = {}
+
+def encode(move):
+    """
+    Encodes a move as a compact string, e.g. ('horizontal', 0, 'left') as 'h0l'.
+
+    Args:
+        move (tuple): The move as (twist, index, direction).
+
+    Returns:
+        str: The encoded move.
+    """
+
+    twist, i, direction = move
+    return f"{twist[0]}{i}{direction[0]}"
+
+def decode(code):
+    """
+    Decodes a compact move string produced by `encode`.
+
+    Args:
+        code (str): The encoded move.
+
+    Returns:
+        tuple: The move as (twist, index, direction).
+
+    Raises:
+        ValueError: If the code is not a valid move.
+    """
+
+    if len(code) < 3 or code[0] not in TWISTS or code[-1] not in DIRECTIONS or not code[1:-1].isdigit():
+        raise ValueError(f"Invalid move: {code}.")
+
+    twist, i, direction = TWISTS[code[0]], int(code[1:-1]), DIRECTIONS[code[-1]]
+    if (twist == 'horizontal') != (direction in ('left', 'right')) or (twist == 'vertical') != (direction in ('up', 'down')):
+        raise ValueError(f"Invalid move: {code}.")
+
+    return twist, i, direction
+
+def digest(state):
+    """
+    Returns a short hash of a cube state, used for ETags.
+
+    Args:
+        state (str): The cube state.
+
+    Returns:
+        str: The hex digest of the state.
+    """
+
+    return hashlib.sha1(state.encode('utf-8')).hexdigest()[:16]
+
+def permutation(n, move):
+    """
+    Computes which sticker lands on each position when a move is applied, memoized per cube size and move.
+
+    The move is applied once to a cube whose stickers are all distinct, so the resulting state reads off the
+    source position of every sticker.
+
+    Args:
+        n (int): Cube size.
+        move (tuple): The move as (twist, index, direction).
+
+    Returns:
+        tuple: Source position of the sticker at each position after the move.
+
+    Raises:
+        ValueError: If the move index is out of bounds or the direction is invalid.
+    """
+
+    if (n, move) not in permutations:
+        cube = Cube(state=''.join(chr(0x4E00 + i) for i in range(6 * n * n)), colors=None)
+
+        twist, i, direction = move
+        if twist == 'horizontal':
+            cube.horizontal_rotate(i, direction)
+        elif twist == 'vertical':
+            cube.vertical_rotate(i, direction)
+        elif twist == 'side':
+            cube.side_rotate(i, direction)
+
+        permutations[(n, move)] = tuple(ord(s) - 0x4E00 for s in cube.state)
+
+    return permutations[(n, move)]
+
+def frames(state, moves):
+    """
+    Replays moves from a state, computing each frame from the previous one.
+
+    Every frame carries only the stickers whose colour changed, as (index, colour) pairs.
+
+    Args:
+        state (str): The starting state of the cube.
+        moves (list): The moves to replay, each as (twist, index, direction).
+
+    Yields:
+        tuple: The move number k (starting at 1), the state after move k and the list of changes.
+    """
+
+    n = int(round((len(state) / 6) ** 0.5))
+    stickers = list(state)
+
+    for k, move in enumerate(moves, start=1):
+        changes = [(j, stickers[p]) for j, p in enumerate(permutation(n, move)) if stickers[p] != stickers[j]]
+        for j, s in changes:
+            stickers[j] = s
+
+        yield k, ''.join(stickers), changes
+
+def state_after(state, moves, k):
+    """
+    Returns the state after the first k moves.
+
+    Args:
+        state (str): The starting state of the cube.
+        moves (list): The moves, each as (twist, index, direction).
+        k (int): Number of moves to apply.
+
+    Returns:
+        str: The state after move k.
+
+    Raises:
+        ValueError: If k is out of bounds.
+    """
+
+    if k < 0 or k > len(moves):
+        raise ValueError("Move number out of bounds.")
+
+    for _, state, _ in frames(state, moves[:k]):
+        pass
+
+    return state